@@ -3,6 +3,14 @@ import pandas as pd
 import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
+import polars as pl
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+import os
+import tempfile
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 st.set_page_config(
@@ -144,18 +152,102 @@ def inject_css():
         unsafe_allow_html=True,
     )
 
+TABLES = ("users", "watch_history", "movies")
+
+COLUMN_TYPES = {
+    "users": {"subscription_start_date": pa.timestamp("ms")},
+    "watch_history": {"watch_date": pa.timestamp("ms")},
+    "movies": {},
+}
+
+# float32 shifts per-user totals by ~1e-5, so users sitting exactly on a quartile cut-off can change level
+FLOAT_COLUMNS = {
+    "users": ["age", "monthly_spend", "household_size"],
+    "watch_history": ["watch_duration_minutes", "progress_percentage", "user_rating"],
+    "movies": [],
+}
+
+CATEGORY_COLUMNS = {
+    "users": ["gender", "subscription_plan", "primary_device", "country"],
+    "watch_history": ["device_type", "action", "quality", "location_country"],
+    "movies": ["genre_primary", "content_type"],
+}
+
+SORT_COLUMNS = {
+    "watch_history": "user_id",
+}
+
+def _csv_to_parquet(base, name):
+    """Parse a CSV and cache it as zstd-compressed Parquet, returning the table even if the cache can't be written"""
+    table = pa_csv.read_csv(
+        base / f"{name}.csv",
+        convert_options=pa_csv.ConvertOptions(column_types=COLUMN_TYPES[name], strings_can_be_null=True),
+    )
+    if name in SORT_COLUMNS:
+        table = table.sort_by(SORT_COLUMNS[name])
+    
+    tmp_path = None
+    try:
+        with tempfile.NamedTemporaryFile(dir=base, prefix=f".{name}.", suffix=".parquet.tmp", delete=False) as tmp:
+            tmp_path = Path(tmp.name)
+        pq.write_table(table, tmp_path, compression="zstd")
+        os.replace(tmp_path, base / f"{name}.parquet")
+    except OSError:
+        if tmp_path is not None:
+            tmp_path.unlink(missing_ok=True)
+    return table
+
+def _is_stale(base, name):
+    parquet_path = base / f"{name}.parquet"
+    if not parquet_path.exists() or parquet_path.stat().st_mtime < (base / f"{name}.csv").stat().st_mtime:
+        return True
+    try:
+        schema = pq.read_schema(parquet_path)
+    except (pa.ArrowInvalid, OSError):
+        return True
+    return any(schema.field(col).type != typ for col, typ in COLUMN_TYPES[name].items() if col in schema.names)
+
+def _read_table(base, name):
+    """Read the Parquet copy of a table, converting the CSV first when the copy is missing or stale"""
+    if _is_stale(base, name):
+        return _csv_to_parquet(base, name)
+    return pq.read_table(base / f"{name}.parquet")
+
+def _load_arrow(base):
+    with ThreadPoolExecutor(max_workers=len(TABLES)) as pool:
+        tables = pool.map(lambda name: _read_table(base, name), TABLES)
+        return dict(zip(TABLES, tables))
+
+def _arrow_tables(base):
+    """Keep the raw Arrow tables for the session so a cache miss skips disk I/O"""
+    if "tables" not in st.session_state:
+        st.session_state["tables"] = _load_arrow(base)
+    return st.session_state["tables"]
+
+def _to_float32(df, columns):
+    """Coerce numeric columns to float32, turning unparseable values into NaN"""
+    for col in columns:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors="coerce", downcast="float")
+    return df
+
+def _to_categories(df, columns):
+    for col in columns:
+        if col in df.columns:
+            df[col] = df[col].astype("category")
+    return df
+
 @st.cache_data
 def load_data():
     """Load and clean Netflix data with comprehensive preprocessing"""
-    base = Path(".")
+    tables = _arrow_tables(Path("."))
     
-    users = pd.read_csv(base / "users.csv", parse_dates=["created_at", "subscription_start_date"])
-    watch = pd.read_csv(base / "watch_history.csv", parse_dates=["watch_date"])
-    movies = pd.read_csv(base / "movies.csv")
+    users = tables["users"].to_pandas()
+    watch = tables["watch_history"].to_pandas()
+    movies = tables["movies"].to_pandas()
     
-    users["monthly_spend"] = pd.to_numeric(users["monthly_spend"], errors="coerce")
-    users["age"] = pd.to_numeric(users["age"], errors="coerce")
-    users["household_size"] = pd.to_numeric(users["household_size"], errors="coerce")
+    users = _to_float32(users, FLOAT_COLUMNS["users"])
+    watch = _to_float32(watch, FLOAT_COLUMNS["watch_history"])
     
     users.loc[(users["age"] < 13) | (users["age"] > 100), "age"] = np.nan
     
@@ -176,14 +268,12 @@ def load_data():
     users = users.drop_duplicates(subset=["user_id"], keep="first")
     
 
-    watch["watch_duration_minutes"] = pd.to_numeric(watch["watch_duration_minutes"], errors="coerce")
     watch.loc[watch["watch_duration_minutes"] < 0, "watch_duration_minutes"] = 0
     watch["watch_duration_minutes"] = watch["watch_duration_minutes"].fillna(0)
     
     watch.loc[watch["watch_duration_minutes"] > 1440, "watch_duration_minutes"] = np.nan
     
     if "user_rating" in watch.columns:
-        watch["user_rating"] = pd.to_numeric(watch["user_rating"], errors="coerce")
         watch.loc[(watch["user_rating"] < 0) | (watch["user_rating"] > 10), "user_rating"] = np.nan
     
     watch = watch.dropna(subset=["user_id", "movie_id"])
@@ -201,26 +291,438 @@ def load_data():
     users = users.dropna(subset=["user_id"])
     watch = watch.dropna(subset=["user_id"])
     
+    users = _to_categories(users, CATEGORY_COLUMNS["users"])
+    watch = _to_categories(watch, CATEGORY_COLUMNS["watch_history"])
+    movies = _to_categories(movies, CATEGORY_COLUMNS["movies"])
+    
     return users, watch, movies
 
-def main():
-    inject_css()
+def _quantiles(values, qs):
+    """Linearly interpolated quantiles (as Series.quantile) via np.partition, skipping NaN"""
+    values = np.asarray(values, dtype=np.float64)
+    values = values[~np.isnan(values)]
+    if values.size == 0:
+        return np.full(len(qs), np.nan)
+    pos = (values.size - 1) * np.asarray(qs, dtype=np.float64)
+    lo, hi = np.floor(pos).astype(np.intp), np.ceil(pos).astype(np.intp)
+    part = np.partition(values, np.union1d(lo, hi))
+    return part[lo] + (pos - lo) * (part[hi] - part[lo])
+
+ENGAGEMENT_COLUMNS = [
+    'user_id', 'subscription_plan', 'primary_device', 'country',
+    'monthly_spend', 'household_size', 'is_active'
+]
+
+def _lazy(df, columns):
+    return pl.from_pandas(df[columns], nan_to_null=True).lazy()
+
+@st.cache_data(show_spinner=False)
+def build_aggregates(watch, movies):
+    """Collapse the event table to per-user totals and a user x genre minutes matrix"""
+    if not watch['user_id'].is_monotonic_increasing:
+        watch = watch.sort_values('user_id', kind='stable')
+    
+    # Events arrive grouped by user, so per-user totals are sums over contiguous blocks
+    user_ids = watch['user_id'].to_numpy()
+    starts = np.flatnonzero(np.r_[True, user_ids[1:] != user_ids[:-1]])
+    user_totals = pd.DataFrame(
+        {'total_watch_minutes': np.add.reduceat(np.nan_to_num(watch['watch_duration_minutes'].to_numpy(np.float64)), starts)},
+        index=pd.Index(user_ids[starts], name='user_id')
+    )
     
-    st.markdown("""
-    <div class='custom-header'>
-        <h1> The Engagement-Monetization Gap</h1>
-        <div class='subtitle'>Why are our most engaged users not our highest spenders?</div>
-        <div class='author-tag'> Made by Max Chartier</div>
-    </div>
-    """, unsafe_allow_html=True)
+    minutes = pl.col('watch_duration_minutes').cast(pl.Float64).sum()
+    events = _lazy(watch, ['user_id', 'movie_id', 'watch_duration_minutes'])
     
-    st.markdown("""
-    This dashboard walks through a critical business problem: we have users who watch extensively 
-    but contribute minimal revenue. Understanding this gap is key to sustainable growth.
-    """)
+    user_genre = (
+        events
+        .join(
+            _lazy(movies, ['movie_id', 'genre_primary']).with_columns(pl.col('genre_primary').cast(pl.String)),
+            on='movie_id'
+        )
+        .drop_nulls('genre_primary')
+        .group_by('user_id', 'genre_primary')
+        .agg(minutes.alias('watch_duration_minutes'))
+        .collect()
+        .to_pandas()
+        .set_index(['user_id', 'genre_primary'])['watch_duration_minutes']
+        .unstack(fill_value=0)
+    )
+    return user_totals, user_genre
+
+@st.cache_data(show_spinner=False)
+def compute_user_engagement(users, user_totals):
+    user_engagement = users[ENGAGEMENT_COLUMNS].join(user_totals, on='user_id')
+    user_engagement['total_watch_minutes'] = user_engagement['total_watch_minutes'].fillna(0)
+    return user_engagement
+
+Kpis = namedtuple('Kpis', ['high_eng_low_spend_pct', 'median_spend', 'top_watchers_avg_spend'])
+
+@st.cache_data(show_spinner=False)
+def compute_kpis(user_engagement):
+    watch_minutes = user_engagement['total_watch_minutes'].to_numpy()
+    spend = user_engagement['monthly_spend'].to_numpy()
+    
+    high_spend = spend.take(np.flatnonzero(watch_minutes > _quantiles(watch_minutes, [0.75])[0]))
+    pct = np.count_nonzero(high_spend < _quantiles(high_spend, [0.5])[0]) / high_spend.size * 100
+    return Kpis(pct, _quantiles(spend, [0.5])[0], np.nanmean(high_spend))
+
+@st.cache_data(show_spinner=False)
+def compute_engagement_density(user_engagement_clean, bins=60):
+    spend = user_engagement_clean['monthly_spend'].to_numpy()
+    watch_minutes = user_engagement_clean['total_watch_minutes'].to_numpy()
+    spend_cap, watch_cap = _quantiles(spend, [0.99])[0], _quantiles(watch_minutes, [0.99])[0]
+    
+    counts, spend_edges, watch_edges = np.histogram2d(
+        np.clip(spend, 0, spend_cap),
+        np.clip(watch_minutes, 0, watch_cap),
+        bins=bins,
+        range=[[0, spend_cap], [0, watch_cap]]
+    )
+    density = pd.DataFrame(
+        np.where(counts > 0, counts, np.nan).T,
+        index=(watch_edges[:-1] + watch_edges[1:]) / 2,
+        columns=(spend_edges[:-1] + spend_edges[1:]) / 2
+    )
+    plan_medians = user_engagement_clean.groupby('subscription_plan', observed=True)[
+        ['monthly_spend', 'total_watch_minutes']
+    ].median().reset_index()
+    return density, plan_medians
+
+@st.cache_data(show_spinner=False)
+def compute_scatter_sample(user_engagement_clean, per_plan=2000):
+    shuffled = user_engagement_clean.sample(frac=1, random_state=0)
+    keep = shuffled.groupby('subscription_plan', observed=True, dropna=False).cumcount() < per_plan
+    return shuffled[keep].sort_index()
+
+@st.cache_data(show_spinner=False)
+def compute_plan_analysis(user_engagement_clean):
+    return (
+        _lazy(user_engagement_clean, ['subscription_plan', 'monthly_spend', 'total_watch_minutes'])
+        .with_columns(pl.col('subscription_plan').cast(pl.String))
+        .drop_nulls('subscription_plan')
+        .group_by('subscription_plan')
+        .agg(
+            pl.col('monthly_spend').mean().alias('avg_spend'),
+            pl.col('total_watch_minutes').mean().alias('avg_watch'),
+            pl.len().alias('user_count'),
+        )
+        .sort('subscription_plan')
+        .collect()
+        .to_pandas()
+    )
+
+@st.cache_data(show_spinner=False)
+def compute_thresholds(user_engagement_clean):
+    watch_quartiles = _quantiles(user_engagement_clean['total_watch_minutes'].to_numpy(), [0, 0.25, 0.5, 0.75, 1])
+    spend_median = _quantiles(user_engagement_clean['monthly_spend'].to_numpy(), [0.5])[0]
+    return watch_quartiles, spend_median
+
+@st.cache_data(show_spinner=False)
+def compute_target_segment(user_engagement_clean, watch_quartiles, spend_median):
+    watch_minutes = user_engagement_clean['total_watch_minutes'].to_numpy()
+    spend = user_engagement_clean['monthly_spend'].to_numpy()
+    in_segment = np.flatnonzero((watch_minutes > watch_quartiles[3]) & (spend < spend_median))
+    return user_engagement_clean[
+        ['user_id', 'subscription_plan', 'primary_device', 'country',
+         'monthly_spend', 'household_size', 'total_watch_minutes']
+    ].take(in_segment)
+
+@st.cache_data(show_spinner=False)
+def compute_genre_engagement(target_user_ids, user_genre):
+    return (
+        user_genre.reindex(target_user_ids, fill_value=0)
+        .sum()
+        .nlargest(10)
+        .rename_axis('genre_primary')
+        .reset_index(name='watch_duration_minutes')
+    )
+
+@st.cache_data(show_spinner=False)
+def compute_monthly_engagement(watch, users):
+    month_key = (pl.col('watch_date').dt.year() * 12 + pl.col('watch_date').dt.month() - 1).cast(pl.Int32)
+    return (
+        _lazy(watch, ['user_id', 'watch_date', 'watch_duration_minutes'])
+        .drop_nulls('watch_date')
+        .group_by('user_id', month_key.alias('month_key'))
+        .agg(pl.col('watch_duration_minutes').cast(pl.Float64).sum())
+        .join(_lazy(users, ['user_id', 'subscription_plan']), on='user_id')
+        .drop_nulls('subscription_plan')
+        .group_by('month_key', 'subscription_plan')
+        .agg(pl.col('watch_duration_minutes').sum())
+        .sort('month_key', 'subscription_plan')
+        .select(
+            pl.date(pl.col('month_key') // 12, pl.col('month_key') % 12 + 1, 1).alias('year_month'),
+            'subscription_plan',
+            'watch_duration_minutes',
+        )
+        .collect()
+        .to_pandas()
+    )
+
+SPEND_EDGES = np.array([0, 5, 10, 15, 100])
+SPEND_BRACKETS = np.array(['$0-5', '$5-10', '$10-15', '$15+'])
+ENGAGEMENT_LEVELS = np.array(['Low', 'Medium', 'High', 'Very High'])
+
+@st.cache_data(show_spinner=False)
+def compute_retention(user_engagement_clean, watch_quartiles):
+    spend = user_engagement_clean['monthly_spend'].to_numpy()
+    watch_minutes = user_engagement_clean['total_watch_minutes'].to_numpy()
+    active = user_engagement_clean['is_active'].to_numpy(np.float64)
+    
+    # Right-closed bins as pd.cut assigns them, with the lowest watch quartile closed on the left too
+    spend_bin = np.searchsorted(SPEND_EDGES, spend, side='left') - 1
+    in_bracket = (spend_bin >= 0) & (spend_bin < len(SPEND_BRACKETS))
+    spend_bin = spend_bin[in_bracket]
+    engagement_bin = np.maximum(np.searchsorted(watch_quartiles, watch_minutes[in_bracket], side='left') - 1, 0)
+    active, spend, watch_minutes = active[in_bracket], spend[in_bracket], watch_minutes[in_bracket]
+    
+    shape = (len(ENGAGEMENT_LEVELS), len(SPEND_BRACKETS))
+    cell = engagement_bin * shape[1] + spend_bin
+    cell_users = np.bincount(cell, minlength=shape[0] * shape[1]).reshape(shape)
+    cell_active = np.bincount(cell, weights=active, minlength=shape[0] * shape[1]).reshape(shape)
+    with np.errstate(invalid='ignore'):
+        retention_rate = np.round(cell_active / cell_users * 100, 1)
+    rows, cols = cell_users.any(axis=1), cell_users.any(axis=0)
+    heatmap_data = pd.DataFrame(
+        retention_rate[np.ix_(rows, cols)],
+        index=ENGAGEMENT_LEVELS[rows],
+        columns=SPEND_BRACKETS[cols]
+    )
     
-    users, watch, movies = load_data()
+    # Bracket counts and retention are the column totals of the cell matrices
+    bracket_users = cell_users.sum(axis=0)
+    observed = bracket_users > 0
+    retention = cell_active.sum(axis=0)[observed] / bracket_users[observed]
+    avg_watch, avg_spend = (
+        np.bincount(spend_bin, weights=values, minlength=shape[1])[observed] / bracket_users[observed]
+        for values in (watch_minutes, spend)
+    )
+    spend_brackets = pd.DataFrame({
+        'spend_bracket': SPEND_BRACKETS[observed],
+        'user_count': bracket_users[observed],
+        'avg_watch_minutes': avg_watch,
+        'avg_spend': avg_spend,
+        'retention': retention
+    })
+    spend_brackets['potential_revenue'] = spend_brackets['user_count'] * spend_brackets['avg_spend']
+    return heatmap_data, spend_brackets
+
+@st.cache_data(show_spinner=False)
+def compute_geo(target_segment):
+    return (
+        _lazy(target_segment, ['country', 'monthly_spend', 'total_watch_minutes'])
+        .with_columns(pl.col('country').cast(pl.String))
+        .drop_nulls('country')
+        .group_by('country')
+        .agg(
+            pl.len().alias('user_count'),
+            pl.col('monthly_spend').mean().alias('avg_spend'),
+            pl.col('total_watch_minutes').mean().alias('avg_watch_minutes'),
+        )
+        .sort(['user_count', 'country'], descending=[True, False])
+        .collect()
+        .to_pandas()
+    )
+
+@st.cache_resource(show_spinner=False)
+def build_scatter_figure(user_engagement_clean):
+    fig_scatter = px.scatter(
+        user_engagement_clean,
+        x='monthly_spend',
+        y='total_watch_minutes',
+        color='subscription_plan',
+        hover_data=['user_id', 'primary_device'],
+        title="User Engagement vs Monthly Spend",
+        labels={'monthly_spend': 'Monthly Spend ($)', 'total_watch_minutes': 'Total Watch Time (minutes)'},
+        render_mode='webgl'
+    )
+    fig_scatter.update_layout(template="plotly_dark")
+    return fig_scatter
+
+@st.cache_resource(show_spinner=False)
+def build_density_figure(density, plan_medians):
+    fig_scatter = go.Figure(go.Heatmap(
+        z=density.values,
+        x=density.columns,
+        y=density.index,
+        colorscale='Reds',
+        colorbar=dict(title="Users"),
+        hovertemplate='Spend: $%{x:.2f}<br>Watch: %{y:.0f} min<br>Users: %{z}<extra></extra>'
+    ))
+    for plan, spend, minutes in zip(plan_medians['subscription_plan'], plan_medians['monthly_spend'], plan_medians['total_watch_minutes']):
+        fig_scatter.add_trace(go.Scatter(
+            x=[spend],
+            y=[minutes],
+            mode='markers',
+            name=f"{plan} median",
+            marker=dict(size=12, symbol='diamond', line=dict(width=1, color='white'))
+        ))
+    fig_scatter.update_layout(
+        template="plotly_dark",
+        title="User Engagement vs Monthly Spend",
+        xaxis_title='Monthly Spend ($)',
+        yaxis_title='Total Watch Time (minutes)',
+        legend=dict(x=0.01, y=0.99)
+    )
+    return fig_scatter
+
+@st.cache_resource(show_spinner=False)
+def build_plan_figure(plan_analysis):
+    fig_plan = go.Figure()
+    fig_plan.add_trace(go.Bar(
+        x=plan_analysis['subscription_plan'],
+        y=plan_analysis['avg_spend'],
+        name='Avg Monthly Spend',
+        marker_color='#e50914'
+    ))
+    fig_plan.add_trace(go.Bar(
+        x=plan_analysis['subscription_plan'],
+        y=plan_analysis['avg_watch'] / 60,
+        name='Avg Watch Hours',
+        marker_color='#4a9eff',
+        yaxis='y2'
+    ))
+    
+    fig_plan.update_layout(
+        template="plotly_dark",
+        title="Spend and Engagement by Subscription Plan",
+        yaxis=dict(title='Avg Monthly Spend ($)'),
+        yaxis2=dict(title='Avg Watch Hours', overlaying='y', side='right'),
+        barmode='group'
+    )
+    return fig_plan
+
+@st.cache_resource(show_spinner=False)
+def build_pie_figure(dist, title, colors):
+    fig = px.pie(
+        values=dist.values,
+        names=dist.index,
+        title=title,
+        color_discrete_sequence=colors
+    )
+    fig.update_layout(template="plotly_dark")
+    return fig
+
+@st.cache_resource(show_spinner=False)
+def build_genre_figure(genre_engagement):
+    fig_genre = px.bar(
+        genre_engagement,
+        x='watch_duration_minutes',
+        y='genre_primary',
+        orientation='h',
+        title="Top Genres Watched by High-Engagement, Low-Spend Users",
+        labels={'watch_duration_minutes': 'Total Watch Minutes', 'genre_primary': 'Genre'},
+        color='watch_duration_minutes',
+        color_continuous_scale='Reds'
+    )
+    fig_genre.update_layout(template="plotly_dark")
+    return fig_genre
+
+@st.cache_resource(show_spinner=False)
+def build_timeline_figure(monthly_engagement):
+    fig_timeline = px.line(
+        monthly_engagement,
+        x='year_month',
+        y='watch_duration_minutes',
+        color='subscription_plan',
+        title="Monthly Watch Time Trends by Subscription Plan",
+        labels={'watch_duration_minutes': 'Total Watch Minutes', 'year_month': 'Month'},
+        markers=True
+    )
+    fig_timeline.update_layout(
+        template="plotly_dark",
+        xaxis_tickangle=-45,
+        xaxis_tickformat='%Y-%m',
+        xaxis_hoverformat='%Y-%m'
+    )
+    return fig_timeline
+
+@st.cache_resource(show_spinner=False)
+def build_heatmap_figure(heatmap_data):
+    fig_heatmap = go.Figure(data=go.Heatmap(
+        z=heatmap_data.values,
+        x=heatmap_data.columns,
+        y=heatmap_data.index,
+        colorscale='RdYlGn',
+        text=heatmap_data.values,
+        texttemplate='%{text:.1f}%',
+        textfont={"size": 14},
+        colorbar=dict(title="Retention %")
+    ))
+    
+    fig_heatmap.update_layout(
+        template="plotly_dark",
+        title="Retention Rate by Engagement Level and Monthly Spend",
+        xaxis_title="Monthly Spend Bracket",
+        yaxis_title="Engagement Level",
+        height=500
+    )
+    return fig_heatmap
+
+@st.cache_resource(show_spinner=False)
+def build_opportunity_figure(spend_brackets):
+    fig_opportunity = go.Figure()
+    
+    fig_opportunity.add_trace(go.Bar(
+        x=spend_brackets['spend_bracket'],
+        y=spend_brackets['user_count'],
+        name='User Count',
+        marker_color='#e50914',
+        yaxis='y'
+    ))
     
+    fig_opportunity.add_trace(go.Scatter(
+        x=spend_brackets['spend_bracket'],
+        y=spend_brackets['avg_watch_minutes'],
+        name='Avg Watch Minutes',
+        mode='lines+markers',
+        marker_color='#4a9eff',
+        yaxis='y2',
+        line=dict(width=3)
+    ))
+    
+    fig_opportunity.add_trace(go.Scatter(
+        x=spend_brackets['spend_bracket'],
+        y=spend_brackets['retention'] * 1000,
+        name='Retention Rate (x1000)',
+        mode='lines+markers',
+        marker_color='#00ff00',
+        yaxis='y3',
+        line=dict(width=3, dash='dot')
+    ))
+    
+    fig_opportunity.update_layout(
+        template="plotly_dark",
+        title="The Monetization Opportunity: User Count, Engagement, and Retention by Spend Level",
+        xaxis=dict(title='Monthly Spend Bracket'),
+        yaxis=dict(title='User Count', side='left'),
+        yaxis2=dict(title='Avg Watch Minutes', overlaying='y', side='right'),
+        yaxis3=dict(title='Retention Rate (scaled)', overlaying='y', side='right', anchor='free', position=0.95),
+        legend=dict(x=0.01, y=0.99)
+    )
+    return fig_opportunity
+
+@st.cache_resource(show_spinner=False)
+def build_map_figure(target_segment_geo):
+    fig_map = px.choropleth(
+        target_segment_geo,
+        locations='country',
+        locationmode='country names',
+        color='user_count',
+        hover_name='country',
+        hover_data={'user_count': True, 'avg_spend': ':.2f', 'avg_watch_minutes': ':.0f'},
+        title="Geographic Distribution of High-Engagement, Low-Spend Users",
+        color_continuous_scale='Reds',
+        labels={'user_count': 'User Count'}
+    )
+    fig_map.update_layout(
+        template="plotly_dark",
+        geo=dict(showframe=False, showcoastlines=True, projection_type='natural earth')
+    )
+    return fig_map
+
+@st.fragment
+def section_problem(user_engagement):
     st.markdown("---")
     st.markdown("<div class='section-header'>Problem: The Data Suggests a Disconnect</div>", unsafe_allow_html=True)
     
@@ -229,54 +731,41 @@ def main():
     But the data tells a different story.
     """)
     
-    avg_watch_per_user = watch.groupby('user_id')['watch_duration_minutes'].sum().reset_index()
-    avg_watch_per_user.columns = ['user_id', 'total_watch_minutes']
-    
-    user_engagement = users.merge(avg_watch_per_user, on='user_id', how='left')
-    user_engagement['total_watch_minutes'] = user_engagement['total_watch_minutes'].fillna(0)
+    kpis = compute_kpis(user_engagement)
     
     col1, col2, col3 = st.columns(3)
     
     with col1:
         st.markdown("<div class='metric-card'>", unsafe_allow_html=True)
-        high_engagement = user_engagement[user_engagement['total_watch_minutes'] > user_engagement['total_watch_minutes'].quantile(0.75)]
-        high_eng_low_spend = high_engagement[high_engagement['monthly_spend'] < high_engagement['monthly_spend'].median()]
-        pct = (len(high_eng_low_spend) / len(high_engagement) * 100)
-        st.metric("High Engagement, Low Spend", f"{pct:.1f}%", help="% of top 25% watchers who spend below median")
+        st.metric("High Engagement, Low Spend", f"{kpis.high_eng_low_spend_pct:.1f}%", help="% of top 25% watchers who spend below median")
         st.markdown("</div>", unsafe_allow_html=True)
     
     with col2:
         st.markdown("<div class='metric-card'>", unsafe_allow_html=True)
-        median_spend = user_engagement['monthly_spend'].dropna().median()
-        st.metric("Median Monthly Spend", f"${median_spend:.2f}")
+        st.metric("Median Monthly Spend", f"${kpis.median_spend:.2f}")
         st.markdown("</div>", unsafe_allow_html=True)
     
     with col3:
         st.markdown("<div class='metric-card'>", unsafe_allow_html=True)
-        top_watchers_avg = high_engagement['monthly_spend'].dropna().mean()
-        st.metric("Avg Spend (Top Watchers)", f"${top_watchers_avg:.2f}")
+        st.metric("Avg Spend (Top Watchers)", f"${kpis.top_watchers_avg_spend:.2f}")
         st.markdown("</div>", unsafe_allow_html=True)
-    
+
+@st.fragment
+def section_gap(user_engagement_clean):
     st.markdown("---")
     st.markdown("<div class='section-header'>Where Does the Gap Appear?</div>", unsafe_allow_html=True)
     
     st.markdown("""
     Let's look at the relationship between engagement and spending across all users. 
-    Each point represents one user.
+    Each cell counts the users at that spend and watch-time level, with each plan's median user marked on top. 
+    Tick "Show raw points" to plot a sample of individual users (up to 2,000 per plan).
     """)
     
-    user_engagement_clean = user_engagement.dropna(subset=['monthly_spend'])
-    
-    fig_scatter = px.scatter(
-        user_engagement_clean,
-        x='monthly_spend',
-        y='total_watch_minutes',
-        color='subscription_plan',
-        hover_data=['user_id', 'primary_device'],
-        title="User Engagement vs Monthly Spend",
-        labels={'monthly_spend': 'Monthly Spend ($)', 'total_watch_minutes': 'Total Watch Time (minutes)'}
-    )
-    fig_scatter.update_layout(template="plotly_dark")
+    if st.checkbox("Show raw points", value=False):
+        fig_scatter = build_scatter_figure(compute_scatter_sample(user_engagement_clean))
+    else:
+        density, plan_medians = compute_engagement_density(user_engagement_clean)
+        fig_scatter = build_density_figure(density, plan_medians)
     st.plotly_chart(fig_scatter, use_container_width=True)
     
     st.markdown("<div class='insight-box'>", unsafe_allow_html=True)
@@ -288,39 +777,14 @@ def main():
     - Potential for targeted upselling
     """)
     st.markdown("</div>", unsafe_allow_html=True)
-    
+
+@st.fragment
+def section_plan_breakdown(user_engagement_clean):
     st.markdown("### Breaking it down by subscription plan")
     
-    plan_analysis = user_engagement_clean.groupby('subscription_plan').agg({
-        'monthly_spend': 'mean',
-        'total_watch_minutes': 'mean',
-        'user_id': 'count'
-    }).reset_index()
-    plan_analysis.columns = ['subscription_plan', 'avg_spend', 'avg_watch', 'user_count']
-    
-    fig_plan = go.Figure()
-    fig_plan.add_trace(go.Bar(
-        x=plan_analysis['subscription_plan'],
-        y=plan_analysis['avg_spend'],
-        name='Avg Monthly Spend',
-        marker_color='#e50914'
-    ))
-    fig_plan.add_trace(go.Bar(
-        x=plan_analysis['subscription_plan'],
-        y=plan_analysis['avg_watch'] / 60,
-        name='Avg Watch Hours',
-        marker_color='#4a9eff',
-        yaxis='y2'
-    ))
+    plan_analysis = compute_plan_analysis(user_engagement_clean)
     
-    fig_plan.update_layout(
-        template="plotly_dark",
-        title="Spend and Engagement by Subscription Plan",
-        yaxis=dict(title='Avg Monthly Spend ($)'),
-        yaxis2=dict(title='Avg Watch Hours', overlaying='y', side='right'),
-        barmode='group'
-    )
-    st.plotly_chart(fig_plan, use_container_width=True)
+    st.plotly_chart(build_plan_figure(plan_analysis), use_container_width=True)
     
     st.markdown("<div class='insight-box'>", unsafe_allow_html=True)
     st.markdown("""
@@ -328,39 +792,26 @@ def main():
     This is our monetization opportunity.
     """)
     st.markdown("</div>", unsafe_allow_html=True)
-    
+
+@st.fragment
+def section_target_segment(target_segment):
     st.markdown("---")
     st.markdown("<div class='section-header'>Deep Dive: Who Are These High-Engagement, Low-Spend Users?</div>", unsafe_allow_html=True)
     
-    target_segment = user_engagement_clean[
-        (user_engagement_clean['total_watch_minutes'] > user_engagement_clean['total_watch_minutes'].quantile(0.75)) &
-        (user_engagement_clean['monthly_spend'] < user_engagement_clean['monthly_spend'].median())
-    ]
-    
     st.markdown(f"**Identified {len(target_segment)} users in this segment.**")
     
     col1, col2 = st.columns(2)
     
     with col1:
         device_dist = target_segment['primary_device'].value_counts()
-        fig_device = px.pie(
-            values=device_dist.values,
-            names=device_dist.index,
-            title="Primary Devices (Target Segment)",
-            color_discrete_sequence=px.colors.sequential.Reds_r
-        )
-        fig_device.update_layout(template="plotly_dark")
+        device_dist = device_dist[device_dist > 0]
+        fig_device = build_pie_figure(device_dist, "Primary Devices (Target Segment)", px.colors.sequential.Reds_r)
         st.plotly_chart(fig_device, use_container_width=True)
     
     with col2:
         plan_dist = target_segment['subscription_plan'].value_counts()
-        fig_plan_dist = px.pie(
-            values=plan_dist.values,
-            names=plan_dist.index,
-            title="Subscription Plans (Target Segment)",
-            color_discrete_sequence=px.colors.sequential.Blues_r
-        )
-        fig_plan_dist.update_layout(template="plotly_dark")
+        plan_dist = plan_dist[plan_dist > 0]
+        fig_plan_dist = build_pie_figure(plan_dist, "Subscription Plans (Target Segment)", px.colors.sequential.Blues_r)
         st.plotly_chart(fig_plan_dist, use_container_width=True)
     
     st.markdown("<div class='insight-box'>", unsafe_allow_html=True)
@@ -369,28 +820,15 @@ def main():
     They are clearly invested in the platform (high watch time) but have not upgraded.
     """)
     st.markdown("</div>", unsafe_allow_html=True)
-    
+
+@st.fragment
+def section_genres(target_segment, user_genre):
     st.markdown("### What content are they watching?")
     
-    target_user_ids = target_segment['user_id'].tolist()
-    target_watch = watch[watch['user_id'].isin(target_user_ids)]
-    target_watch = target_watch.merge(movies[['movie_id', 'genre_primary']], on='movie_id', how='left')
+    target_user_ids = target_segment['user_id']
+    genre_engagement = compute_genre_engagement(target_user_ids, user_genre)
     
-    genre_engagement = target_watch.groupby('genre_primary')['watch_duration_minutes'].sum().reset_index()
-    genre_engagement = genre_engagement.sort_values('watch_duration_minutes', ascending=False).head(10)
-    
-    fig_genre = px.bar(
-        genre_engagement,
-        x='watch_duration_minutes',
-        y='genre_primary',
-        orientation='h',
-        title="Top Genres Watched by High-Engagement, Low-Spend Users",
-        labels={'watch_duration_minutes': 'Total Watch Minutes', 'genre_primary': 'Genre'},
-        color='watch_duration_minutes',
-        color_continuous_scale='Reds'
-    )
-    fig_genre.update_layout(template="plotly_dark")
-    st.plotly_chart(fig_genre, use_container_width=True)
+    st.plotly_chart(build_genre_figure(genre_engagement), use_container_width=True)
     
     st.markdown("<div class='insight-box'>", unsafe_allow_html=True)
     st.markdown("""
@@ -398,26 +836,14 @@ def main():
     We can use this to personalize upsell messaging around premium content in these genres.
     """)
     st.markdown("</div>", unsafe_allow_html=True)
-    
+
+@st.fragment
+def section_timeline(watch, users):
     st.markdown("### Engagement patterns over time")
     
-    watch_with_users = watch.merge(users[['user_id', 'subscription_plan', 'monthly_spend']], on='user_id', how='left')
-    watch_with_users['watch_date'] = pd.to_datetime(watch_with_users['watch_date'])
-    watch_with_users['year_month'] = watch_with_users['watch_date'].dt.to_period('M').astype(str)
+    monthly_engagement = compute_monthly_engagement(watch, users)
     
-    monthly_engagement = watch_with_users.groupby(['year_month', 'subscription_plan'])['watch_duration_minutes'].sum().reset_index()
-    
-    fig_timeline = px.line(
-        monthly_engagement,
-        x='year_month',
-        y='watch_duration_minutes',
-        color='subscription_plan',
-        title="Monthly Watch Time Trends by Subscription Plan",
-        labels={'watch_duration_minutes': 'Total Watch Minutes', 'year_month': 'Month'},
-        markers=True
-    )
-    fig_timeline.update_layout(template="plotly_dark", xaxis_tickangle=-45)
-    st.plotly_chart(fig_timeline, use_container_width=True)
+    st.plotly_chart(build_timeline_figure(monthly_engagement), use_container_width=True)
     
     st.markdown("<div class='insight-box'>", unsafe_allow_html=True)
     st.markdown("""
@@ -425,51 +851,14 @@ def main():
     This pattern reinforces that engagement alone doesn't drive upgrades.
     """)
     st.markdown("</div>", unsafe_allow_html=True)
-    
+
+@st.fragment
+def section_retention(user_engagement_clean, watch_quartiles):
     st.markdown("### The retention-spend relationship")
     
-    retention_df = user_engagement_clean.copy()
-    
-    retention_df['spend_bracket'] = pd.cut(
-        retention_df['monthly_spend'],
-        bins=[0, 5, 10, 15, 100],
-        labels=['$0-5', '$5-10', '$10-15', '$15+']
-    )
-    
-    retention_df['engagement_level'] = pd.qcut(
-        retention_df['total_watch_minutes'], 
-        q=4, 
-        labels=['Low', 'Medium', 'High', 'Very High'],
-        duplicates='drop'
-    )
-    
-    retention_matrix = retention_df.groupby(['engagement_level', 'spend_bracket']).agg({
-        'is_active': ['sum', 'count']
-    }).reset_index()
-    retention_matrix.columns = ['engagement_level', 'spend_bracket', 'active_count', 'total_count']
-    retention_matrix['retention_rate'] = (retention_matrix['active_count'] / retention_matrix['total_count'] * 100).round(1)
-    
-    heatmap_data = retention_matrix.pivot(index='engagement_level', columns='spend_bracket', values='retention_rate')
-    
-    fig_heatmap = go.Figure(data=go.Heatmap(
-        z=heatmap_data.values,
-        x=heatmap_data.columns,
-        y=heatmap_data.index,
-        colorscale='RdYlGn',
-        text=heatmap_data.values,
-        texttemplate='%{text:.1f}%',
-        textfont={"size": 14},
-        colorbar=dict(title="Retention %")
-    ))
+    heatmap_data, _ = compute_retention(user_engagement_clean, watch_quartiles)
     
-    fig_heatmap.update_layout(
-        template="plotly_dark",
-        title="Retention Rate by Engagement Level and Monthly Spend",
-        xaxis_title="Monthly Spend Bracket",
-        yaxis_title="Engagement Level",
-        height=500
-    )
-    st.plotly_chart(fig_heatmap, use_container_width=True)
+    st.plotly_chart(build_heatmap_figure(heatmap_data), use_container_width=True)
     
     st.markdown("<div class='insight-box'>", unsafe_allow_html=True)
     st.markdown("""
@@ -485,7 +874,9 @@ def main():
     to higher tiers could reduce this churn risk while increasing revenue.
     """)
     st.markdown("</div>", unsafe_allow_html=True)
-    
+
+@st.fragment
+def section_drivers(target_segment, user_engagement):
     st.markdown("---")
     st.markdown("<div class='section-header'>Insights: What's Causing the Gap?</div>", unsafe_allow_html=True)
     
@@ -502,9 +893,8 @@ def main():
         Household size data could confirm this.
         """)
         
-        hh_analysis = target_segment.dropna(subset=['household_size'])
-        if not hh_analysis.empty:
-            avg_hh = hh_analysis['household_size'].mean()
+        avg_hh = target_segment['household_size'].mean()
+        if pd.notna(avg_hh):
             st.metric("Avg Household Size (Target Segment)", f"{avg_hh:.1f}")
             st.markdown(f"Compare to overall average: {user_engagement['household_size'].mean():.1f}")
     
@@ -515,73 +905,30 @@ def main():
         Testing targeted discounts or trials could convert them.
         """)
         
-        basic_users = target_segment[target_segment['subscription_plan'] == 'Basic']
-        st.metric("Basic Plan Users in Segment", f"{len(basic_users)}")
+        basic_users = np.count_nonzero(target_segment['subscription_plan'].eq('Basic').to_numpy())
+        st.metric("Basic Plan Users in Segment", f"{basic_users}")
     
     st.markdown("#### 3. Lack of Awareness")
     st.markdown("""
     Users may not understand the value of Premium features (4K, multiple screens, downloads). 
     In-app messaging highlighting these benefits could drive upgrades.
     """)
-    
+
+@st.fragment
+def section_opportunity(user_engagement_clean, watch_quartiles):
     st.markdown("### Visualizing the opportunity")
     
-    spend_brackets = retention_df.groupby('spend_bracket').agg({
-        'user_id': 'count',
-        'total_watch_minutes': 'mean',
-        'monthly_spend': 'mean',
-        'is_active': 'mean'
-    }).reset_index()
-    spend_brackets.columns = ['spend_bracket', 'user_count', 'avg_watch_minutes', 'avg_spend', 'retention']
-    spend_brackets['potential_revenue'] = spend_brackets['user_count'] * spend_brackets['avg_spend']
-    
-    fig_opportunity = go.Figure()
-    
-    fig_opportunity.add_trace(go.Bar(
-        x=spend_brackets['spend_bracket'],
-        y=spend_brackets['user_count'],
-        name='User Count',
-        marker_color='#e50914',
-        yaxis='y'
-    ))
-    
-    fig_opportunity.add_trace(go.Scatter(
-        x=spend_brackets['spend_bracket'],
-        y=spend_brackets['avg_watch_minutes'],
-        name='Avg Watch Minutes',
-        mode='lines+markers',
-        marker_color='#4a9eff',
-        yaxis='y2',
-        line=dict(width=3)
-    ))
-    
-    fig_opportunity.add_trace(go.Scatter(
-        x=spend_brackets['spend_bracket'],
-        y=spend_brackets['retention'] * 1000,
-        name='Retention Rate (x1000)',
-        mode='lines+markers',
-        marker_color='#00ff00',
-        yaxis='y3',
-        line=dict(width=3, dash='dot')
-    ))
-    
-    fig_opportunity.update_layout(
-        template="plotly_dark",
-        title="The Monetization Opportunity: User Count, Engagement, and Retention by Spend Level",
-        xaxis=dict(title='Monthly Spend Bracket'),
-        yaxis=dict(title='User Count', side='left'),
-        yaxis2=dict(title='Avg Watch Minutes', overlaying='y', side='right'),
-        yaxis3=dict(title='Retention Rate (scaled)', overlaying='y', side='right', anchor='free', position=0.95),
-        legend=dict(x=0.01, y=0.99)
-    )
+    _, spend_brackets = compute_retention(user_engagement_clean, watch_quartiles)
     
-    st.plotly_chart(fig_opportunity, use_container_width=True)
+    st.plotly_chart(build_opportunity_figure(spend_brackets), use_container_width=True)
     
     st.markdown("<div class='insight-box'>", unsafe_allow_html=True)
     st.markdown("""
     """)
     st.markdown("</div>", unsafe_allow_html=True)
-    
+
+@st.fragment
+def section_geography(target_segment):
     st.markdown("---")
     st.markdown("<div class='section-header'>Geographic Distribution: Where Are the Opportunities?</div>", unsafe_allow_html=True)
     
@@ -590,43 +937,25 @@ def main():
     pricing, and content offerings.
     """)
     
-    target_segment_geo = target_segment.groupby('country').agg({
-        'user_id': 'count',
-        'monthly_spend': 'mean',
-        'total_watch_minutes': 'mean'
-    }).reset_index()
-    target_segment_geo.columns = ['country', 'user_count', 'avg_spend', 'avg_watch_minutes']
-    target_segment_geo = target_segment_geo.sort_values('user_count', ascending=False)
+    target_segment_geo = compute_geo(target_segment)
     
     col1, col2 = st.columns([2, 1])
     
     with col1:
-        fig_map = px.choropleth(
-            target_segment_geo,
-            locations='country',
-            locationmode='country names',
-            color='user_count',
-            hover_name='country',
-            hover_data={'user_count': True, 'avg_spend': ':.2f', 'avg_watch_minutes': ':.0f'},
-            title="Geographic Distribution of High-Engagement, Low-Spend Users",
-            color_continuous_scale='Reds',
-            labels={'user_count': 'User Count'}
-        )
-        fig_map.update_layout(
-            template="plotly_dark",
-            geo=dict(showframe=False, showcoastlines=True, projection_type='natural earth')
-        )
-        st.plotly_chart(fig_map, use_container_width=True)
+        st.plotly_chart(build_map_figure(target_segment_geo), use_container_width=True)
     
     with col2:
         st.markdown("#### Top 5 Countries")
         top_countries = target_segment_geo.head(5)
-        for idx, row in top_countries.iterrows():
-            st.markdown(f"**{row['country']}**")
-            st.markdown(f"- Users: {row['user_count']}")
-            st.markdown(f"- Avg Spend: ${row['avg_spend']:.2f}")
-            st.markdown(f"- Avg Watch: {row['avg_watch_minutes']:.0f} min")
-            st.markdown("---")
+        st.markdown("\n\n".join(
+            f"**{country}**\n\n- Users: {users}\n- Avg Spend: ${spend:.2f}\n- Avg Watch: {minutes:.0f} min\n\n---"
+            for country, users, spend, minutes in zip(
+                top_countries['country'],
+                top_countries['user_count'],
+                top_countries['avg_spend'],
+                top_countries['avg_watch_minutes']
+            )
+        ))
     
     st.markdown("<div class='insight-box'>", unsafe_allow_html=True)
     st.markdown("""
@@ -636,6 +965,40 @@ def main():
     through strategic interventions.
     """)
     st.markdown("</div>", unsafe_allow_html=True)
+
+def main():
+    inject_css()
+    
+    st.markdown("""
+    <div class='custom-header'>
+        <h1> The Engagement-Monetization Gap</h1>
+        <div class='subtitle'>Why are our most engaged users not our highest spenders?</div>
+        <div class='author-tag'> Made by Max Chartier</div>
+    </div>
+    """, unsafe_allow_html=True)
+    
+    st.markdown("""
+    This dashboard walks through a critical business problem: we have users who watch extensively 
+    but contribute minimal revenue. Understanding this gap is key to sustainable growth.
+    """)
+    
+    users, watch, movies = load_data()
+    user_totals, user_genre = build_aggregates(watch, movies)
+    user_engagement = compute_user_engagement(users, user_totals)
+    user_engagement_clean = user_engagement.dropna(subset=['monthly_spend'])
+    watch_quartiles, spend_median = compute_thresholds(user_engagement_clean)
+    target_segment = compute_target_segment(user_engagement_clean, watch_quartiles, spend_median)
+    
+    section_problem(user_engagement)
+    section_gap(user_engagement_clean)
+    section_plan_breakdown(user_engagement_clean)
+    section_target_segment(target_segment)
+    section_genres(target_segment, user_genre)
+    section_timeline(watch, users)
+    section_retention(user_engagement_clean, watch_quartiles)
+    section_drivers(target_segment, user_engagement)
+    section_opportunity(user_engagement_clean, watch_quartiles)
+    section_geography(target_segment)
     
     st.markdown("---")
     st.markdown("<div class='section-header'>Implications: What Should We Do?</div>", unsafe_allow_html=True)